@@ -3,25 +3,141 @@ Email Notifier Module
 Sends email alerts when stock thresholds are crossed
 """
 import smtplib
+from dataclasses import dataclass
 from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import List, Dict
+from typing import TYPE_CHECKING, List, Dict, Optional
 import logging
 import os
-from datetime import datetime
+import threading
+
+if TYPE_CHECKING:
+    # Annotations only: keeps this module importable as both email_notifier and src.email_notifier
+    from threshold_checker import SummaryRow
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True, slots=True)
+class _MailConfig:
+    """SMTP settings, read from the environment once at import"""
+    smtp_server: str
+    smtp_port: int
+    sender: Optional[str]
+    password: Optional[str]
+    recipient: Optional[str]
+
+
+_CONFIG = _MailConfig(
+    smtp_server=os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
+    smtp_port=int(os.getenv('SMTP_PORT', '587')),
+    sender=os.getenv('SENDER_EMAIL'),
+    password=os.getenv('SENDER_PASSWORD'),
+    recipient=os.getenv('RECIPIENT_EMAIL'),
+)
+
+# Seconds an SMTP operation may block; bounds NOOP probes on a silently dropped connection
+SMTP_TIMEOUT = 30
+
+# Static pieces of the email bodies, built once at import
+_EQ_RULE = "=" * 50
+_DASH_RULE = "-" * 50
+
+_HTML_HEADER = """
+        <html>
+        <head>
+            <style>
+                body { font-family: 'Courier New', monospace; font-size: 14px; }
+                .header { font-weight: bold; font-size: 16px; margin-bottom: 20px; }
+                .stock-ok { color: #0066cc; margin: 5px 0; }
+                .stock-alert { color: #cc0000; margin: 5px 0; }
+                .footer { margin-top: 20px; font-size: 12px; color: #666; }
+            </style>
+        </head>
+        <body>
+            <div class="header">Stock Price Summary - Daily Report</div>
+        """
+
+# One line per stock; rows without a price have no status or progress
+_ROW_TPL = '<div class="{cls}">{name}: {price} {status} (Upper: {upper}, Lower: {lower}){percentage}{holding}</div>\n'
+_ROW_NA_TPL = '<div class="stock-ok">{name}: {price} (Upper: {upper}, Lower: {lower}){holding}</div>\n'
+
+_HTML_FOOTER = """
+            <div class="footer">This is an automated daily summary from StockTracker.</div>
+        </body>
+        </html>
+        """
+
+
 class EmailNotifier:
     """Sends email notifications for threshold violations"""
 
     def __init__(self):
-        self.smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-        self.smtp_port = int(os.getenv('SMTP_PORT', '587'))
-        self.sender_email = os.getenv('SENDER_EMAIL')
-        self.sender_password = os.getenv('SENDER_PASSWORD')
-        self.recipient_email = os.getenv('RECIPIENT_EMAIL')
+        self.cfg = _CONFIG
+        self._credentials_ok = bool(self.cfg.sender and self.cfg.password and self.cfg.recipient)
+        self._base_headers = {'From': self.cfg.sender, 'To': self.cfg.recipient}
+        self._smtp = None  # Cached SMTP connection, reused across sends
+        self._lock = threading.RLock()  # Sends may come from several worker threads
+
+    def _connect(self) -> smtplib.SMTP:
+        """Open and authenticate a new SMTP connection"""
+        # Use SMTP_SSL for port 465, regular SMTP with STARTTLS for port 587
+        if self.cfg.smtp_port == 465:
+            server = smtplib.SMTP_SSL(self.cfg.smtp_server, self.cfg.smtp_port, timeout=SMTP_TIMEOUT)
+        else:
+            server = smtplib.SMTP(self.cfg.smtp_server, self.cfg.smtp_port, timeout=SMTP_TIMEOUT)
+
+        try:
+            if self.cfg.smtp_port != 465:
+                server.starttls()
+            server.login(self.cfg.sender, self.cfg.password)
+        except Exception:
+            # Don't leak the socket when STARTTLS or authentication fails
+            server.close()
+            raise
+        return server
+
+    def _get_connection(self) -> smtplib.SMTP:
+        """
+        Return a live SMTP connection, opening one only when needed
+
+        The cached connection is probed with NOOP before reuse; if the server
+        dropped it (idle timeout) or answers with an error status, a fresh
+        connection is opened and authenticated.
+        """
+        if self._smtp is not None:
+            try:
+                status = self._smtp.noop()[0]
+            except (smtplib.SMTPException, OSError):
+                status = -1
+
+            if 0 < status < 400:
+                return self._smtp
+
+            logger.debug("SMTP connection no longer usable, reconnecting")
+            self.close()
+
+        self._smtp = self._connect()
+        return self._smtp
+
+    def _send(self, message):
+        """Send a message, serializing access to the shared connection"""
+        with self._lock:
+            server = self._get_connection()
+            server.send_message(message)
+
+    def close(self):
+        """Close the cached SMTP connection, if any"""
+        with self._lock:
+            if self._smtp is None:
+                return
+
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                # Connection already gone, nothing left to clean up
+                pass
+            finally:
+                self._smtp = None
 
     def send_alert(self, violations: List[Dict]) -> bool:
         """
@@ -37,67 +153,64 @@ class EmailNotifier:
             logger.info("No violations to report")
             return True
 
-        if not all([self.sender_email, self.sender_password, self.recipient_email]):
+        if not self._credentials_ok:
             logger.error("Email configuration incomplete. Check environment variables.")
             return False
 
         try:
-            # Create email message
-            message = MIMEMultipart()
-            message['From'] = self.sender_email
-            message['To'] = self.recipient_email
-            message['Subject'] = f'Stock Alert: {len(violations)} Threshold(s) Crossed'
-
-            # Build email body
-            body = self._build_email_body(violations)
-            message.attach(MIMEText(body, 'plain'))
-
-            # Send email
-            # Use SMTP_SSL for port 465, regular SMTP with STARTTLS for port 587
-            if self.smtp_port == 465:
-                with smtplib.SMTP_SSL(self.smtp_server, self.smtp_port) as server:
-                    server.login(self.sender_email, self.sender_password)
-                    server.send_message(message)
-            else:
-                with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                    server.starttls()
-                    server.login(self.sender_email, self.sender_password)
-                    server.send_message(message)
+            message = self.build_alert_message(violations)
+
+            # Send email over the cached connection
+            self._send(message)
 
-            logger.info(f"Alert email sent successfully for {len(violations)} violation(s)")
+            logger.info("Alert email sent successfully for %d violation(s)", len(violations))
             return True
 
         except Exception as e:
             logger.error(f"Failed to send email: {str(e)}")
+            self.close()
             return False
 
+    def _build_message(self, body: str, subtype: str, subject: str) -> MIMEText:
+        """Create a single-part email message with the common headers"""
+        # A lone MIMEText avoids the multipart container and its boundary generation.
+        # Bodies always contain '€', so declare utf-8 rather than letting MIMEText probe for ascii.
+        message = MIMEText(body, subtype, _charset='utf-8')
+        for header, value in self._base_headers.items():
+            message[header] = value
+        message['Subject'] = subject
+        return message
+
+    def build_alert_message(self, violations: List[Dict]) -> MIMEText:
+        """Create the alert email message for threshold violations"""
+        body = self._build_email_body(violations)
+        return self._build_message(body, 'plain', f'Stock Alert: {len(violations)} Threshold(s) Crossed')
+
     def _build_email_body(self, violations: List[Dict]) -> str:
         """Build the email body text from violations"""
-        body = "Stock Threshold Alert\n"
-        body += "=" * 50 + "\n\n"
+        parts = ["Stock Threshold Alert\n", _EQ_RULE, "\n\n"]
 
         for violation in violations:
             # Show name if available
             if violation.get('name'):
-                body += f"Stock: {violation['name']}\n"
-                body += f"Symbol: {violation['symbol']}\n"
-            else:
-                body += f"Symbol: {violation['symbol']}\n"
+                parts.append(f"Stock: {violation['name']}\n")
+            parts.append(f"Symbol: {violation['symbol']}\n")
 
-            body += f"Current Price: {violation['current_price']:.4f}€\n"
-            body += f"Threshold ({violation['threshold_type']}): {violation['threshold']:.4f}€\n"
-            body += f"Status: {violation['message']}\n"
-            body += "-" * 50 + "\n\n"
+            parts.append(f"Current Price: {violation['current_price']:.4f}€\n")
+            parts.append(f"Threshold ({violation['threshold_type']}): {violation['threshold']:.4f}€\n")
+            parts.append(f"Status: {violation['message']}\n")
+            parts.append(_DASH_RULE)
+            parts.append("\n\n")
 
-        body += "\nThis is an automated alert from StockTracker.\n"
-        return body
+        parts.append("\nThis is an automated alert from StockTracker.\n")
+        return "".join(parts)
 
-    def send_daily_summary(self, stocks_data: List[Dict]) -> bool:
+    def send_daily_summary(self, stocks_data: List['SummaryRow']) -> bool:
         """
         Send daily summary email with all stock prices and thresholds
 
         Args:
-            stocks_data: List of dictionaries with stock info (symbol, name, price, thresholds)
+            stocks_data: List of classified and formatted stock rows
 
         Returns:
             True if email sent successfully, False otherwise
@@ -106,171 +219,115 @@ class EmailNotifier:
             logger.info("No stocks data to report in daily summary")
             return True
 
-        if not all([self.sender_email, self.sender_password, self.recipient_email]):
+        if not self._credentials_ok:
             logger.error("Email configuration incomplete. Check environment variables.")
             return False
 
         try:
-            # Create email message
-            message = MIMEMultipart()
-            message['From'] = self.sender_email
-            message['To'] = self.recipient_email
-            message['Subject'] = 'Stock Price Summary - Daily Report'
-
-            # Build HTML email body
-            html_body = self._build_summary_html(stocks_data)
-            message.attach(MIMEText(html_body, 'html'))
-
-            # Send email
-            # Use SMTP_SSL for port 465, regular SMTP with STARTTLS for port 587
-            if self.smtp_port == 465:
-                with smtplib.SMTP_SSL(self.smtp_server, self.smtp_port) as server:
-                    server.login(self.sender_email, self.sender_password)
-                    server.send_message(message)
-            else:
-                with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                    server.starttls()
-                    server.login(self.sender_email, self.sender_password)
-                    server.send_message(message)
+            message = self.build_summary_message(stocks_data)
+
+            # Send email over the cached connection
+            self._send(message)
 
-            logger.info(f"Daily summary email sent successfully for {len(stocks_data)} stock(s)")
+            logger.info("Daily summary email sent successfully for %d stock(s)", len(stocks_data))
             return True
 
         except Exception as e:
             logger.error(f"Failed to send daily summary email: {str(e)}")
+            self.close()
             return False
 
-    def _build_summary_body(self, stocks_data: List[Dict]) -> str:
-        """Build the email body text for daily summary"""
-        body = "Stock Price Summary - Daily Report\n"
-        body += "=" * 50 + "\n\n"
+    def build_summary_message(self, stocks_data: List['SummaryRow']) -> MIMEText:
+        """Create the daily summary email message"""
+        html_body = self._build_summary_html(stocks_data)
+        return self._build_message(html_body, 'html', 'Stock Price Summary - Daily Report')
 
-        for stock in stocks_data:
-            # Show name and symbol
-            if stock.get('name'):
-                body += f"Stock: {stock['name']}\n"
-                body += f"Symbol: {stock['symbol']}\n"
-            else:
-                body += f"Symbol: {stock['symbol']}\n"
+    def send_batch(self, messages: List[MIMEText]) -> bool:
+        """
+        Send several prepared messages back-to-back over one SMTP session
 
-            # Current price
-            price = stock.get('price')
-            if price is not None:
-                body += f"Current Price: {price:.4f}€\n"
-            else:
-                body += "Current Price: N/A\n"
+        Args:
+            messages: Messages from build_alert_message/build_summary_message
 
-            # Thresholds
-            upper = stock.get('upper_threshold')
-            lower = stock.get('lower_threshold')
+        Returns:
+            True if all emails sent successfully, False otherwise
+        """
+        if not messages:
+            return True
 
-            if upper and upper > 0:
-                body += f"Upper Threshold: {upper:.4f}€\n"
-            else:
-                body += "Upper Threshold: Not set\n"
+        if not self._credentials_ok:
+            logger.error("Email configuration incomplete. Check environment variables.")
+            return False
 
-            if lower and lower > 0:
-                body += f"Lower Threshold: {lower:.4f}€\n"
-            else:
-                body += "Lower Threshold: Not set\n"
+        try:
+            with self._lock:
+                server = self._get_connection()
+                for i, message in enumerate(messages):
+                    if i > 0:
+                        # Reset the transaction state between messages
+                        server.rset()
+                    server.send_message(message)
+
+            logger.info("Sent %d email(s) in one SMTP session", len(messages))
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to send email batch: {str(e)}")
+            self.close()
+            return False
+
+    def _build_summary_body(self, stocks_data: List['SummaryRow']) -> str:
+        """Build the email body text for daily summary"""
+        parts = ["Stock Price Summary - Daily Report\n", _EQ_RULE, "\n\n"]
+
+        for stock in stocks_data:
+            # Show name and symbol
+            if stock.name:
+                parts.append(f"Stock: {stock.name}\n")
+            parts.append(f"Symbol: {stock.symbol}\n")
+
+            # Current price, thresholds and status
+            parts.append(f"Current Price: {stock.price_text or 'N/A'}\n")
+            parts.append(f"Upper Threshold: {stock.upper_text}\n")
+            parts.append(f"Lower Threshold: {stock.lower_text}\n")
 
-            # Status
-            if price is not None:
-                status = "OK"
-                if upper and upper > 0 and price >= upper:
+            if stock.price_text is not None:
+                if stock.alert == 'upper':
                     status = "ALERT - Above upper threshold"
-                elif lower and lower > 0 and price <= lower:
+                elif stock.alert == 'lower':
                     status = "ALERT - Below lower threshold"
-                body += f"Status: {status}\n"
+                else:
+                    status = "OK"
+                parts.append(f"Status: {status}\n")
 
-            body += "-" * 50 + "\n\n"
+            parts.append(_DASH_RULE)
+            parts.append("\n\n")
 
-        body += "\nThis is an automated daily summary from StockTracker.\n"
-        return body
+        parts.append("\nThis is an automated daily summary from StockTracker.\n")
+        return "".join(parts)
 
-    def _build_summary_html(self, stocks_data: List[Dict]) -> str:
+    def _build_summary_html(self, stocks_data: List['SummaryRow']) -> str:
         """Build HTML email body for daily summary with colored lines"""
-        html = """
-        <html>
-        <head>
-            <style>
-                body { font-family: 'Courier New', monospace; font-size: 14px; }
-                .header { font-weight: bold; font-size: 16px; margin-bottom: 20px; }
-                .stock-ok { color: #0066cc; margin: 5px 0; }
-                .stock-alert { color: #cc0000; margin: 5px 0; }
-                .footer { margin-top: 20px; font-size: 12px; color: #666; }
-            </style>
-        </head>
-        <body>
-            <div class="header">Stock Price Summary - Daily Report</div>
-        """
+        parts = [_HTML_HEADER]
 
         for stock in stocks_data:
-            # Get stock info
-            name = stock.get('name', '')
-            symbol = stock.get('symbol')
-            price = stock.get('price')
-            upper = stock.get('upper_threshold')
-            lower = stock.get('lower_threshold')
-            initial = stock.get('initial_value')
-            initial_date = stock.get('initial_date')
-
-            # Build display name
-            display_name = f"{name} ({symbol})" if name else symbol
-
-            # Format thresholds
-            upper_text = f"{upper:.4f}€" if (upper and upper > 0) else "Not set"
-            lower_text = f"{lower:.4f}€" if (lower and lower > 0) else "Not set"
-
-            # Calculate percentage to upper threshold
-            # Formula: (current - initial) / (upper - initial) * 100
-            percentage_text = ""
-            if price is not None and initial and upper and upper > 0:
-                if upper > initial:  # Only calculate if upper threshold is above initial value
-                    percentage = ((price - initial) / (upper - initial)) * 100
-                    percentage_text = f" - {percentage:.1f}% to target"
-
-            # Calculate holding period (retention duration)
-            holding_text = ""
-            if initial_date:
-                try:
-                    purchase_date = datetime.strptime(initial_date, "%Y-%m-%d")
-                    today = datetime.now()
-                    days_held = (today - purchase_date).days
-
-                    # Format as years and days or just days
-                    if days_held >= 365:
-                        years = days_held // 365
-                        remaining_days = days_held % 365
-                        holding_text = f" - Held: {years}y {remaining_days}d"
-                    else:
-                        holding_text = f" - Held: {days_held}d"
-                except ValueError:
-                    # Invalid date format, skip
-                    pass
-
-            # Determine status and color
-            is_alert = False
-            if price is not None:
-                if upper and upper > 0 and price >= upper:
-                    is_alert = True
-                elif lower and lower > 0 and price <= lower:
-                    is_alert = True
-
-            # Build line
-            if price is not None:
-                price_text = f"{price:.4f}€"
-                status_text = "[ALERT]" if is_alert else "[OK]"
-                css_class = "stock-alert" if is_alert else "stock-ok"
-
-                html += f'<div class="{css_class}">{display_name}: {price_text} {status_text} (Upper: {upper_text}, Lower: {lower_text}){percentage_text}{holding_text}</div>\n'
+            if stock.price_text is not None:
+                template = _ROW_TPL
+                price = stock.price_text
             else:
-                html += f'<div class="stock-ok">{display_name}: N/A (Upper: {upper_text}, Lower: {lower_text}){holding_text}</div>\n'
-
-        html += """
-            <div class="footer">This is an automated daily summary from StockTracker.</div>
-        </body>
-        </html>
-        """
-
-        return html
+                template = _ROW_NA_TPL
+                price = "N/A"
+
+            parts.append(template.format_map({
+                'cls': "stock-alert" if stock.alert else "stock-ok",
+                'name': stock.display_name,
+                'price': price,
+                'status': "[ALERT]" if stock.alert else "[OK]",
+                'upper': stock.upper_text,
+                'lower': stock.lower_text,
+                'percentage': f" - {stock.percentage_text}" if stock.percentage_text else "",
+                'holding': f" - {stock.holding_text}" if stock.holding_text else "",
+            }))
+
+        parts.append(_HTML_FOOTER)
+        return "".join(parts)
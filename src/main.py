@@ -3,33 +3,96 @@ StockTracker Main Application
 Monitors stock prices and sends alerts when thresholds are crossed
 """
 import logging
+import logging.handlers
 import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from apscheduler.schedulers.blocking import BlockingScheduler
+
+# Load environment variables before importing modules that read them at import time
+load_dotenv()
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor as SchedulerThreadPool
+from apscheduler.triggers.cron import CronTrigger
 from stock_fetcher import StockFetcher
-from threshold_checker import ThresholdChecker
+from threshold_checker import ThresholdChecker, SummaryRow
 from email_notifier import EmailNotifier
-from colorama import Fore, Style, init
+import colorama
 from datetime import datetime
+from typing import List, Optional
+from zoneinfo import ZoneInfo
 
-# Initialize colorama for Windows compatibility
-init(autoreset=True)
 
-# Load environment variables
-load_dotenv()
+class _NoColor:
+    """Stand-in for colorama's Fore/Style that produces no escape sequences"""
+
+    def __getattr__(self, _):
+        return ''
+
+
+if sys.stdout.isatty():
+    # Initialize colorama for Windows compatibility
+    colorama.init(autoreset=True)
+    _Fore, _Style = colorama.Fore, colorama.Style
+else:
+    # Not a terminal (Docker, systemd): keep ANSI escapes out of the logs
+    _Fore = _Style = _NoColor()
+
+# ANSI sequences used by the price summary, resolved once
+_OK_PREFIX = _Fore.BLUE
+_ALERT_PREFIX = _Fore.RED
+_BRIGHT = _Style.BRIGHT
+_RESET = _Style.RESET_ALL
+
+
+class FastFormatter(logging.Formatter):
+    """Log formatter that calls strftime at most once per second instead of once per record"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._last_time = (None, '')  # (epoch second, formatted), swapped atomically
+
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        cached_second, formatted = self._last_time
+        if second != cached_second:
+            formatted = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+            self._last_time = (second, formatted)
+        # Same layout as the default asctime, e.g. "2024-01-01 12:00:00,123"
+        return f"{formatted},{int(record.msecs):03d}"
+
 
 # Configure logging
+log_formatter = FastFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+file_handler = logging.FileHandler('data/stocktracker.log')
+file_handler.setFormatter(log_formatter)
+# Buffer file writes; flushed at the end of each check cycle or right away on WARNING and above
+memory_handler = logging.handlers.MemoryHandler(capacity=1024, flushLevel=logging.WARNING, target=file_handler)
+stream_handler = logging.StreamHandler()
+stream_handler.setFormatter(log_formatter)
+# Logging calls only enqueue the record; a background thread formats and writes it
+log_queue = queue.Queue(-1)
+log_listener = logging.handlers.QueueListener(log_queue, memory_handler, stream_handler, respect_handler_level=True)
+queue_handler = logging.handlers.QueueHandler(log_queue)
+queue_handler.setFormatter(logging.Formatter('%(message)s'))  # Only merges args; the listener's handlers add the layout
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('data/stocktracker.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[queue_handler]
 )
+log_listener.start()
 
 logger = logging.getLogger(__name__)
 
+# Only check prices on weekdays during trading hours (local time of the market)
+_MARKET_HOURS_ONLY = os.getenv('MARKET_HOURS_ONLY', 'true').lower() == 'true'
+_MARKET_TIMEZONE = ZoneInfo(os.getenv('MARKET_TIMEZONE', 'Europe/Paris'))
+_MARKET_OPEN_HOUR = 9
+_MARKET_CLOSE_HOUR = 18
+
 
 class StockTracker:
     """Main application class for stock tracking and alerting"""
@@ -38,139 +101,217 @@ class StockTracker:
         self.fetcher = StockFetcher()
         self.checker = ThresholdChecker(config_path='config/stocks.json')
         self.notifier = EmailNotifier()
-        self.scheduler = BlockingScheduler()
+        # Separate executors so a slow summary email never holds up a price check
+        self.scheduler = BackgroundScheduler(executors={
+            'default': SchedulerThreadPool(2),
+            'mail': SchedulerThreadPool(1),
+        })
         self.last_prices = {}  # Cache last fetched prices
-
-    def check_stocks(self):
-        """Main checking routine - fetches prices and checks thresholds"""
+        self.last_summary_rows = []  # Classified rows from the last check, reused by the daily summary
+        # Emails are sent in the background so a slow SMTP server never delays a price check
+        self._mail_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mail")
+
+    def check_stocks(self, include_summary: bool = False, force: bool = False):
+        """
+        Main checking routine - fetches prices and checks thresholds
+
+        Args:
+            include_summary: Also send the daily summary, sharing the SMTP session with any alert
+            force: Check even when the market is closed
+        """
+        try:
+            self._run_check(include_summary, force)
+        finally:
+            # Once the listener has handled this cycle's records, write them to the log file in one go
+            log_queue.join()
+            memory_handler.flush()
+
+    def _run_check(self, include_summary: bool, force: bool):
+        """Run one check cycle, see check_stocks()"""
         logger.info("Starting stock check cycle...")
 
+        # Pick up edits to stocks.json without restarting
+        self.checker.reload_if_changed()
+
         # Get tracked symbols
         symbols = self.checker.get_tracked_symbols()
         if not symbols:
             logger.warning("No stocks configured for tracking")
             return
 
-        # Get display names for logging
-        display_names = self.checker.get_stock_display_names()
-        logger.info(f"Tracking {len(symbols)} stocks: {', '.join(display_names)}")
+        # Nothing can trigger an alert: prices are only fetched for the daily summary
+        if not self.checker.has_any_threshold:
+            logger.info("No thresholds configured, skipping price check")
+            if include_summary:
+                self.send_daily_summary()
+            return
 
-        # Get symbol to name mapping for fetcher logging
-        symbol_to_name = self.checker.get_symbol_to_name_map()
+        # Prices do not move while the market is closed
+        if not force and not self._is_market_open():
+            logger.info("Market closed, skipping price check")
+            return
 
-        # Fetch current prices
-        prices = self.fetcher.get_multiple_prices(symbols, symbol_to_name)
+        # Log display names, skipping the join entirely when INFO is disabled
+        if logger.isEnabledFor(logging.INFO):
+            display_names = self.checker.get_stock_display_names()
+            logger.info("Tracking %d stocks: %s", len(symbols), ', '.join(display_names))
 
-        # Cache the prices for potential reuse
-        self.last_prices = prices
+        prices, summary_rows = self._update_prices(symbols)
 
         # Display colored price summary
-        self._display_price_summary(prices, symbol_to_name)
+        self._display_price_summary(summary_rows)
 
         # Check for threshold violations
         violations = self.checker.check_thresholds(prices)
 
         # Send alerts if violations found
         if violations:
-            logger.warning(f"Found {len(violations)} threshold violation(s)")
-            self.notifier.send_alert(violations)
+            logger.warning("Found %d threshold violation(s)", len(violations))
         else:
             logger.info("No threshold violations detected")
 
+        if include_summary and violations:
+            # Alert and summary go out back-to-back over a single SMTP session
+            messages = [
+                self.notifier.build_alert_message(violations),
+                self.notifier.build_summary_message(summary_rows),
+            ]
+            self._mail_pool.submit(self.notifier.send_batch, messages)
+        elif violations:
+            self._mail_pool.submit(self.notifier.send_alert, violations)
+        elif include_summary:
+            self._mail_pool.submit(self.notifier.send_daily_summary, summary_rows)
+
         logger.info("Stock check cycle completed")
 
     def send_daily_summary(self):
-        """Send daily summary email with all stock prices and thresholds"""
+        """
+        Send daily summary email with all stock prices and thresholds
+
+        Sends right away: the scheduled job already runs on its own 'mail' executor.
+        """
         logger.info("Preparing daily summary email...")
 
-        # Use cached prices from last check_stocks() call
-        prices = self.last_prices
+        # Without thresholds check_stocks() never fetches, so fetch for the summary here
+        if not self.checker.has_any_threshold:
+            self.checker.reload_if_changed()
+            symbols = self.checker.get_tracked_symbols()
+            if symbols:
+                self._update_prices(symbols)
 
-        if not prices:
+        # Use cached rows from last price fetch
+        if not self.last_prices:
             logger.warning("No cached prices available, skipping daily summary")
             return
 
-        # Build stocks data for email
-        stocks_data = []
-        for stock_config in self.checker.stocks:
-            symbol = stock_config.get('symbol')
-            stock_info = {
-                'symbol': symbol,
-                'name': stock_config.get('name', ''),
-                'price': prices.get(symbol),
-                'initial_value': stock_config.get('initial_value'),
-                'initial_date': stock_config.get('initial_date'),
-                'upper_threshold': stock_config.get('upper_threshold'),
-                'lower_threshold': stock_config.get('lower_threshold')
-            }
-            stocks_data.append(stock_info)
-
         # Send summary email
-        self.notifier.send_daily_summary(stocks_data)
-        logger.info("Daily summary email sent")
+        self.notifier.send_daily_summary(self.last_summary_rows)
 
-    def _display_price_summary(self, prices, symbol_to_name):
-        """Display colored summary of stock prices vs thresholds"""
-        print(f"\n{Style.BRIGHT}=== Stock Price Summary ==={Style.RESET_ALL}")
+    def _update_prices(self, symbols):
+        """Fetch current prices and refresh the cached prices and summary rows"""
+        # Get symbol to name mapping for fetcher logging
+        symbol_to_name = self.checker.get_symbol_to_name_map()
+
+        # Fetch current prices
+        prices = self.fetcher.get_multiple_prices(symbols, symbol_to_name)
+
+        # Classify and format every stock once, for both console and email output
+        summary_rows = self._classify_and_format(prices)
+
+        # Cache for the daily summary
+        self.last_prices = prices
+        self.last_summary_rows = summary_rows
+        return prices, summary_rows
+
+    @staticmethod
+    def _is_market_open() -> bool:
+        """Check whether the market is open, or always True if MARKET_HOURS_ONLY is disabled"""
+        if not _MARKET_HOURS_ONLY:
+            return True
+
+        now = datetime.now(tz=_MARKET_TIMEZONE)
+        return now.weekday() < 5 and _MARKET_OPEN_HOUR <= now.hour < _MARKET_CLOSE_HOUR
+
+    def _classify_and_format(self, prices) -> List[SummaryRow]:
+        """
+        Check every stock against its thresholds and format its values once
 
-        for stock_config in self.checker.stocks:
-            symbol = stock_config.get('symbol')
-            name = stock_config.get('name', '')
-            upper_threshold = stock_config.get('upper_threshold')
-            lower_threshold = stock_config.get('lower_threshold')
-            initial_value = stock_config.get('initial_value')
-            initial_date = stock_config.get('initial_date')
+        The resulting rows feed both the console summary and the daily summary email.
+        """
+        rows = []
+        today = datetime.now()
 
-            if symbol not in prices or prices[symbol] is None:
+        for symbol, name, display_name, upper, lower, initial_value, initial_date in self.checker.get_display_rows():
+            # Format thresholds
+            upper_text = f"{upper:.4f}€" if (upper and upper > 0) else "Not set"
+            lower_text = f"{lower:.4f}€" if (lower and lower > 0) else "Not set"
+
+            holding_text = self._format_holding_period(initial_date, today)
+
+            price = prices.get(symbol)
+            if price is None:
+                rows.append(SummaryRow(symbol, name, display_name, None, upper_text, lower_text, '', '', holding_text))
                 continue
 
-            price = prices[symbol]
-            display_name = f"{name} ({symbol})" if name else symbol
+            # Determine threshold status
+            alert = ''
+            if upper and upper > 0 and price >= upper:
+                alert = 'upper'
+            elif lower and lower > 0 and price <= lower:
+                alert = 'lower'
 
             # Calculate percentage to upper threshold
             # Formula: (current - initial) / (upper - initial) * 100
             percentage_text = ""
-            if initial_value and upper_threshold and upper_threshold > 0:
-                if upper_threshold > initial_value:  # Only calculate if upper threshold is above initial value
-                    percentage = ((price - initial_value) / (upper_threshold - initial_value)) * 100
-                    percentage_text = f" / {percentage:.1f}% to target"
-
-            # Calculate holding period (retention duration)
-            holding_text = ""
-            if initial_date:
-                try:
-                    purchase_date = datetime.strptime(initial_date, "%Y-%m-%d")
-                    today = datetime.now()
-                    days_held = (today - purchase_date).days
-
-                    # Format as years and days or just days
-                    if days_held >= 365:
-                        years = days_held // 365
-                        remaining_days = days_held % 365
-                        holding_text = f" / Held: {years}y {remaining_days}d"
-                    else:
-                        holding_text = f" / Held: {days_held}d"
-                except ValueError:
-                    # Invalid date format, skip
-                    pass
-
-            # Determine color based on threshold status
-            # Blue if within thresholds, Red if violated
-            is_within_thresholds = True
+            if initial_value and upper and upper > 0:
+                if upper > initial_value:  # Only calculate if upper threshold is above initial value
+                    percentage = ((price - initial_value) / (upper - initial_value)) * 100
+                    percentage_text = f"{percentage:.1f}% to target"
 
-            # Check if price violates thresholds
-            if upper_threshold and upper_threshold > 0 and price >= upper_threshold:
-                is_within_thresholds = False
-            if lower_threshold and lower_threshold > 0 and price <= lower_threshold:
-                is_within_thresholds = False
+            rows.append(SummaryRow(symbol, name, display_name, f"{price:.4f}€", upper_text, lower_text,
+                                   alert, percentage_text, holding_text))
 
-            # Print with color
-            if is_within_thresholds:
-                print(f"{Fore.BLUE}{display_name}: {price:.4f}€ [OK]{percentage_text}{holding_text}{Style.RESET_ALL}")
+        return rows
+
+    @staticmethod
+    def _format_holding_period(initial_date: Optional[str], today: datetime) -> str:
+        """Format the holding period (retention duration) since initial_date"""
+        if not initial_date:
+            return ""
+
+        try:
+            purchase_date = datetime.strptime(initial_date, "%Y-%m-%d")
+        except ValueError:
+            # Invalid date format, skip
+            return ""
+
+        days_held = (today - purchase_date).days
+
+        # Format as years and days or just days
+        if days_held >= 365:
+            return f"Held: {days_held // 365}y {days_held % 365}d"
+        return f"Held: {days_held}d"
+
+    def _display_price_summary(self, summary_rows: List[SummaryRow]):
+        """Display colored summary of stock prices vs thresholds"""
+        # Collect all lines and write them at once instead of one print() per stock
+        lines = ["", f"{_BRIGHT}=== Stock Price Summary ==={_RESET}"]
+
+        for row in summary_rows:
+            if row.price_text is None:
+                continue
+
+            extra_text = "".join(f" / {text}" for text in (row.percentage_text, row.holding_text) if text)
+
+            # Blue if within thresholds, Red if violated
+            if row.alert:
+                lines.append(f"{_ALERT_PREFIX}{row.display_name}: {row.price_text} [ALERT] (threshold crossed!){extra_text}{_RESET}")
             else:
-                print(f"{Fore.RED}{display_name}: {price:.4f}€ [ALERT] (threshold crossed!){percentage_text}{holding_text}{Style.RESET_ALL}")
+                lines.append(f"{_OK_PREFIX}{row.display_name}: {row.price_text} [OK]{extra_text}{_RESET}")
 
-        print()
+        lines.append("")
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
 
     def run(self):
         """Start the stock tracker with scheduled checks"""
@@ -179,11 +320,9 @@ class StockTracker:
 
         logger.info(f"StockTracker starting with {check_interval} minute check interval")
 
-        # Run initial check immediately
-        self.check_stocks()
-
-        # Send initial daily summary on startup
-        self.send_daily_summary()
+        # Run initial check immediately, even if the market is closed,
+        # sending the initial daily summary with it
+        self.check_stocks(include_summary=True, force=True)
 
         # Schedule periodic checks
         self.scheduler.add_job(
@@ -193,19 +332,29 @@ class StockTracker:
             id='stock_check'
         )
 
-        # Schedule daily summary email (every 24 hours)
+        # Schedule daily summary email at a fixed time of day (default: 17:00)
+        summary_hour = int(os.getenv('SUMMARY_HOUR', '17'))
         self.scheduler.add_job(
             self.send_daily_summary,
-            'interval',
-            hours=24,
-            id='daily_summary'
+            CronTrigger(hour=summary_hour, minute=0),
+            id='daily_summary',
+            executor='mail'
         )
 
+        self.scheduler.start()
         logger.info("Scheduler started. Press Ctrl+C to exit.")
         try:
-            self.scheduler.start()
+            # Jobs run in background threads, the main thread just waits for Ctrl+C
+            threading.Event().wait()
         except (KeyboardInterrupt, SystemExit):
             logger.info("StockTracker shutting down...")
+            self.scheduler.shutdown()
+            # Let queued emails go out before closing the SMTP connection
+            self._mail_pool.shutdown(wait=True)
+            self.notifier.close()
+            self.fetcher.close()
+            # Write out the records still queued
+            log_listener.stop()
 
 
 if __name__ == '__main__':
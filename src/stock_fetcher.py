@@ -2,14 +2,112 @@
 Stock Fetcher Module
 Fetches current stock prices using Yahoo Finance API or web scraping
 """
-import yfinance as yf
-from typing import Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Optional, Tuple
+import asyncio
+import json
 import logging
+import random
+import re
+import threading
 import time
 import os
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library json module is used without it
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Yahoo Finance quote endpoint, returns the prices of many symbols in one request
+YAHOO_QUOTE_URL = 'https://query1.finance.yahoo.com/v7/finance/quote'
+
+# Longest single backoff between API retries, and total backoff budget per symbol (seconds)
+MAX_RETRY_DELAY = 8
+MAX_RETRY_WAIT = 20
+
+# yfinance lookups tried in order: last close over growing periods, then the quote info
+_YFINANCE_STRATEGIES = (
+    ('period: 1d', lambda ticker: ticker.history(period='1d')['Close'].iloc[-1]),
+    ('period: 5d', lambda ticker: ticker.history(period='5d')['Close'].iloc[-1]),
+    ('period: 1mo', lambda ticker: ticker.history(period='1mo')['Close'].iloc[-1]),
+    ('info', lambda ticker: ticker.info['currentPrice']),
+    ('regularMarketPrice', lambda ticker: ticker.info['regularMarketPrice']),
+)
+
+
+def _json_loads(data: bytes):
+    """Parse JSON, with orjson if available"""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialize to JSON bytes, with orjson if available"""
+    return orjson.dumps(obj) if orjson else json.dumps(obj).encode()
+
+
+def _create_session() -> requests.Session:
+    """Create a keep-alive session with a larger connection pool and retries on transient errors"""
+    session = requests.Session()
+    session.headers['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class FileCache:
+    """On-disk price cache (one small JSON file per symbol) so fresh prices survive restarts"""
+
+    def __init__(self, directory: str, ttl: int):
+        """
+        Initialize FileCache
+
+        Args:
+            directory: Directory holding the cache files (created if missing)
+            ttl: Maximum age of a cached price in seconds
+        """
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, symbol: str) -> str:
+        """Get the cache file path for a symbol (unsafe characters such as ':' replaced)"""
+        return os.path.join(self.directory, f"{re.sub(r'[^A-Za-z0-9._-]', '_', symbol)}.json")
+
+    def get(self, symbol: str) -> Optional[Tuple[float, float]]:
+        """
+        Get a cached price if it is still fresh
+
+        Returns:
+            Tuple of (price, age in seconds) or None if missing or expired
+        """
+        try:
+            with open(self._path(symbol), 'rb') as f:
+                entry = _json_loads(f.read())
+            age = time.time() - entry['ts']
+            if 0 <= age < self.ttl:
+                return float(entry['price']), age
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def set(self, symbol: str, price: float):
+        """Store a price, replacing the file atomically"""
+        path = self._path(symbol)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(_json_dumps({'price': price, 'ts': time.time()}))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"Could not write price cache for {symbol}: {str(e)}")
+
 
 class StockFetcher:
     """Fetches stock prices from Yahoo Finance API or web scraping"""
@@ -22,7 +120,27 @@ class StockFetcher:
             use_web_scraping: If True, use web scraping. If False, use API.
                             If None, read from environment variable USE_WEB_SCRAPING
         """
+        # In-memory price cache: symbol -> (price, time.monotonic() when fetched)
         self.cache = {}
+        self._ttl = int(os.getenv('PRICE_TTL_SECONDS', '60'))
+
+        # Optional on-disk cache for cold starts
+        cache_dir = os.getenv('PRICE_CACHE_DIR')
+        self.file_cache = FileCache(cache_dir, self._ttl) if cache_dir else None
+
+        # Maximum number of symbols fetched at the same time
+        self.max_concurrency = int(os.getenv('FETCH_CONCURRENCY', '4'))
+
+        # HTTP session shared by all Yahoo Finance requests
+        self.session = _create_session()
+
+        # Batched quote requests, turned off once Yahoo refuses them (the endpoint may need a crumb)
+        self.use_quote_api = True
+
+        # Event loop reused across check cycles, keeping HTTP connections alive;
+        # callers may come from several scheduler threads, so only one at a time runs it
+        self._loop = asyncio.new_event_loop()
+        self._loop_lock = threading.Lock()
 
         # Determine which method to use
         if use_web_scraping is None:
@@ -53,68 +171,157 @@ class StockFetcher:
         Returns:
             Current stock price or None if fetch fails
         """
+        with self._loop_lock:
+            return self._loop.run_until_complete(self.get_stock_price_async(symbol, retry_count, name))
+
+    async def get_stock_price_async(self, symbol: str, retry_count: int = 3, name: str = '') -> Optional[float]:
+        """
+        Fetch the current price for a given stock symbol inside the event loop
+
+        Args:
+            symbol: Stock ticker symbol (e.g., 'AAPL', 'GOOGL')
+            retry_count: Number of retry attempts (default: 3)
+            name: Optional stock name for better logging
+
+        Returns:
+            Current stock price or None if fetch fails
+        """
+        price = self._get_cached_price(symbol)
+        if price is not None:
+            logger.debug("Using cached price for %s: %.4f", symbol, price)
+            return price
+
+        price = await self._fetch_price(symbol, retry_count, name)
+        if price is not None:
+            self._cache_price(symbol, price)
+        return price
+
+    def _get_cached_price(self, symbol: str) -> Optional[float]:
+        """Get a price fetched less than PRICE_TTL_SECONDS ago, from memory or disk"""
+        entry = self.cache.get(symbol)
+        if entry and time.monotonic() - entry[1] < self._ttl:
+            return entry[0]
+
+        if self.file_cache:
+            hit = self.file_cache.get(symbol)
+            if hit:
+                price, age = hit
+                self.cache[symbol] = (price, time.monotonic() - age)
+                return price
+
+        return None
+
+    def _cache_price(self, symbol: str, price: float):
+        """Remember a freshly fetched price"""
+        self.cache[symbol] = (price, time.monotonic())
+        if self.file_cache:
+            self.file_cache.set(symbol, price)
+
+    async def _fetch_price(self, symbol: str, retry_count: int, name: str) -> Optional[float]:
+        """Fetch a price from the network (web scraping and/or Yahoo Finance API)"""
         # Create display name for logging
         display_name = f"{name} ({symbol})" if name else symbol
 
         # Use web scraping if enabled
         if self.use_web_scraping and self.web_scraper:
             logger.info(f"Fetching {display_name} via web scraping")
-            price = self.web_scraper.get_stock_price(symbol, name=name)
+            price = await self.web_scraper.get_stock_price_async(symbol, name=name)
             if price:
                 return price
             logger.warning(f"Web scraping failed for {display_name}, trying API fallback")
 
-        # Use Yahoo Finance API (original method)
-        for attempt in range(retry_count):
-            try:
-                # Add user agent to reduce rate limiting
-                ticker = yf.Ticker(symbol)
-                ticker.session.headers['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-
-                # Try multiple periods to get data
-                for period in ['1d', '5d', '1mo']:
-                    try:
-                        data = ticker.history(period=period)
-
-                        if not data.empty:
-                            current_price = data['Close'].iloc[-1]
-                            logger.info(f"Fetched {symbol}: ${current_price:.4f} (period: {period})")
-                            return float(current_price)
-                    except Exception as period_error:
-                        logger.debug(f"Period {period} failed for {symbol}: {str(period_error)}")
-                        continue
-
-                # If history failed, try using info as fallback
-                try:
-                    info = ticker.info
-                    if info and 'currentPrice' in info:
-                        current_price = info['currentPrice']
-                        logger.info(f"Fetched {symbol} from info: ${current_price:.4f}")
-                        return float(current_price)
-                    elif info and 'regularMarketPrice' in info:
-                        current_price = info['regularMarketPrice']
-                        logger.info(f"Fetched {symbol} from regularMarketPrice: ${current_price:.4f}")
-                        return float(current_price)
-                except Exception as info_error:
-                    logger.debug(f"Info fallback failed for {symbol}: {str(info_error)}")
+        return await self._get_price_from_api(symbol, retry_count)
 
-                logger.warning(f"No data returned for symbol: {symbol} (attempt {attempt + 1}/{retry_count})")
+    def _get_prices_from_quote_api(self, symbols: list) -> Dict[str, float]:
+        """
+        Fetch the prices of several symbols with a single Yahoo Finance quote request
+
+        Args:
+            symbols: List of stock ticker symbols
+
+        Returns:
+            Dictionary mapping symbols to prices; symbols without a quote are left out,
+            and an empty dictionary is returned if the request fails
+        """
+        try:
+            response = self.session.get(YAHOO_QUOTE_URL, params={'symbols': ','.join(symbols)}, timeout=10)
+            if response.status_code in (401, 403):
+                self.use_quote_api = False
+                logger.warning(f"Yahoo quote endpoint refused the request (status {response.status_code}), "
+                               f"using yfinance from now on")
+                return {}
+            if response.status_code != 200:
+                logger.warning(f"Yahoo quote endpoint returned status {response.status_code}, falling back to yfinance")
+                return {}
+
+            results = _json_loads(response.content)['quoteResponse']['result']
+        except Exception as e:
+            logger.warning(f"Yahoo quote endpoint failed, falling back to yfinance: {str(e)}")
+            return {}
 
-                # Wait before retrying
-                if attempt < retry_count - 1:
-                    time.sleep(2 ** attempt)  # Exponential backoff: 1s, 2s, 4s
+        wanted = set(symbols)
+        prices = {}
+        for quote in results:
+            symbol = quote.get('symbol')
+            price = quote.get('regularMarketPrice')
+            if symbol in wanted and price is not None:
+                prices[symbol] = float(price)
+                logger.info(f"Fetched {symbol}: ${prices[symbol]:.4f} (quote)")
+        return prices
+
+    async def _get_price_from_api(self, symbol: str, retry_count: int) -> Optional[float]:
+        """Fetch the current price from the Yahoo Finance API, with jittered retries"""
+        deadline = time.monotonic() + MAX_RETRY_WAIT
 
+        for attempt in range(retry_count):
+            try:
+                # yfinance is blocking, run it in a worker thread
+                price = await asyncio.to_thread(self._get_price_from_yfinance, symbol)
+                if price is not None:
+                    return price
+                logger.warning(f"No data returned for symbol: {symbol} (attempt {attempt + 1}/{retry_count})")
             except Exception as e:
                 logger.error(f"Error fetching price for {symbol} (attempt {attempt + 1}/{retry_count}): {str(e)}")
-                if attempt < retry_count - 1:
-                    time.sleep(2 ** attempt)
+
+            # Wait before retrying: exponential backoff (~1s, 2s, 4s) with jitter so
+            # concurrent fetches don't retry in lockstep, within the per-symbol budget
+            if attempt < retry_count - 1:
+                delay = min(MAX_RETRY_DELAY, (2 ** attempt) * random.uniform(0.8, 1.5))
+                if time.monotonic() + delay > deadline:
+                    logger.error(f"Giving up on {symbol} after {attempt + 1} attempts (retry budget exhausted)")
+                    return None
+                await asyncio.sleep(delay)
 
         logger.error(f"Failed to fetch {symbol} after {retry_count} attempts")
         return None
 
-    def get_multiple_prices(self, symbols: list, symbol_to_name: Dict[str, str] = None) -> Dict[str, Optional[float]]:
+    def _get_price_from_yfinance(self, symbol: str) -> Optional[float]:
+        """Make one blocking yfinance lookup (history, then info) for a symbol"""
+        # Imported on first use: yfinance pulls in pandas, which scraping-only runs never need
+        import yfinance as yf
+
+        # Shared session: pooled connections and a browser user agent to reduce rate limiting
+        ticker = yf.Ticker(symbol, session=self.session)
+
+        for label, strategy in _YFINANCE_STRATEGIES:
+            try:
+                current_price = float(strategy(ticker))
+            except Exception as e:
+                logger.debug(f"Lookup ({label}) failed for {symbol}: {str(e)}")
+                continue
+
+            if current_price:
+                logger.info(f"Fetched {symbol}: ${current_price:.4f} ({label})")
+                return current_price
+
+        return None
+
+    async def get_multiple_prices_async(self, symbols: list, symbol_to_name: Dict[str, str] = None) -> Dict[str, Optional[float]]:
         """
-        Fetch prices for multiple stock symbols
+        Fetch prices for multiple stock symbols concurrently
+
+        In API mode all symbols are first requested in one Yahoo Finance quote call;
+        the remaining symbols are fetched individually, at most max_concurrency at once.
 
         Args:
             symbols: List of stock ticker symbols
@@ -126,11 +333,55 @@ class StockFetcher:
         if symbol_to_name is None:
             symbol_to_name = {}
 
+        # Serve fresh cached prices without any network work
         prices = {}
-        for i, symbol in enumerate(symbols):
-            name = symbol_to_name.get(symbol, '')
-            prices[symbol] = self.get_stock_price(symbol, name=name)
-            # Add delay between requests to avoid rate limiting
-            if i < len(symbols) - 1:  # Don't delay after last symbol
-                time.sleep(3)  # Wait 3 seconds between each request
-        return prices
+        to_fetch = []
+        for symbol in symbols:
+            price = self._get_cached_price(symbol)
+            if price is not None:
+                prices[symbol] = price
+            else:
+                to_fetch.append(symbol)
+
+        # API mode: one batched request instead of a yfinance lookup per symbol
+        if to_fetch and not self.use_web_scraping and self.use_quote_api:
+            quotes = await asyncio.to_thread(self._get_prices_from_quote_api, to_fetch)
+            for symbol, price in quotes.items():
+                self._cache_price(symbol, price)
+            prices.update(quotes)
+            to_fetch = [symbol for symbol in to_fetch if symbol not in quotes]
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch_one(symbol: str) -> Optional[float]:
+            async with semaphore:
+                name = symbol_to_name.get(symbol, '')
+                return await self.get_stock_price_async(symbol, name=name)
+
+        results = await asyncio.gather(*(fetch_one(symbol) for symbol in to_fetch))
+        prices.update(zip(to_fetch, results))
+        return {symbol: prices[symbol] for symbol in symbols}
+
+    def get_multiple_prices(self, symbols: list, symbol_to_name: Dict[str, str] = None) -> Dict[str, Optional[float]]:
+        """
+        Fetch prices for multiple stock symbols
+
+        Args:
+            symbols: List of stock ticker symbols
+            symbol_to_name: Optional mapping of symbols to names for better logging
+
+        Returns:
+            Dictionary mapping symbols to their current prices
+        """
+        with self._loop_lock:
+            return self._loop.run_until_complete(self.get_multiple_prices_async(symbols, symbol_to_name))
+
+    def close(self):
+        """Release the event loop and HTTP connections used for fetching"""
+        with self._loop_lock:
+            if not self._loop.is_closed():
+                if self.web_scraper:
+                    self._loop.run_until_complete(self.web_scraper.aclose())
+                self._loop.run_until_complete(self._loop.shutdown_default_executor())
+                self._loop.close()
+        self.session.close()
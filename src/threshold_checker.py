@@ -4,33 +4,148 @@ Checks if stock prices have crossed defined thresholds
 """
 import json
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, NamedTuple, Optional, Tuple
 import logging
 
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library json module is used without it
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Threshold violation messages
+_UPPER_MSG = "{display_name} reached ${price:.4f} (threshold: ${threshold:.4f})"
+_LOWER_MSG = "{display_name} dropped to ${price:.4f} (threshold: ${threshold:.4f})"
+
+
+class StockRow(NamedTuple):
+    """Per-stock fields used for display, extracted once from the config"""
+    symbol: str
+    name: str
+    display_name: str
+    upper_threshold: Optional[float]
+    lower_threshold: Optional[float]
+    initial_value: Optional[float]
+    initial_date: Optional[str]
+
+
+class SummaryRow(NamedTuple):
+    """Threshold status and pre-formatted values of a stock, shared by console and email output"""
+    symbol: str
+    name: str
+    display_name: str
+    price_text: Optional[str]  # None when no price was fetched
+    upper_text: str
+    lower_text: str
+    alert: str  # 'upper', 'lower', or '' when within thresholds
+    percentage_text: str  # Progress toward the upper threshold, '' if not applicable
+    holding_text: str  # Holding period since initial_date, '' if unknown
+
 
 class ThresholdChecker:
     """Manages stock thresholds and checks for threshold violations"""
 
+    # Parsed configs shared by all instances: path -> (st_mtime_ns, stocks)
+    _config_cache: Dict[str, Tuple[int, List[Dict]]] = {}
+
     def __init__(self, config_path: str = "config/stocks.json"):
         self.config_path = config_path
+        self._config_mtime = self._get_config_mtime()
         self.stocks = self.load_stocks()
+        self._index_stocks()
 
-    def load_stocks(self) -> List[Dict]:
-        """Load stock threshold configuration from JSON file"""
-        if not os.path.exists(self.config_path):
-            logger.warning(f"Config file not found: {self.config_path}")
-            return []
+    def _get_config_mtime(self) -> Optional[int]:
+        """Get modification time of the config file in nanoseconds, or None if it is missing"""
+        try:
+            return os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reload the stock configuration if the config file changed on disk
 
+        Returns:
+            True if the configuration was reloaded, False otherwise
+        """
+        mtime = self._get_config_mtime()
+        if mtime == self._config_mtime:
+            return False
+
+        logger.info(f"Config file changed, reloading: {self.config_path}")
         try:
-            with open(self.config_path, 'r') as f:
-                data = json.load(f)
-                return data.get('stocks', [])
+            stocks = self._read_stocks()
+        except Exception as e:
+            # Possibly saved half-way: keep the current watchlist and retry next cycle
+            logger.error(f"Error loading stock config, keeping the previous one: {str(e)}")
+            return False
+
+        self._config_mtime = mtime
+        self.stocks = stocks
+        self._index_stocks()
+        return True
+
+    def _index_stocks(self):
+        """Derive cached data from the loaded stock configuration"""
+        self._rows = None  # Built lazily by get_display_rows()
+
+        self._tracked_symbols = [stock.get('symbol') for stock in self.stocks if stock.get('symbol')]
+        self._symbol_to_name = {stock.get('symbol'): stock.get('name', '') for stock in self.stocks if stock.get('symbol')}
+
+        # Whether any stock can trigger an alert at all (-1, 0 or None disable a threshold)
+        self.has_any_threshold = any(
+            (stock.get('upper_threshold') or 0) > 0 or (stock.get('lower_threshold') or 0) > 0
+            for stock in self.stocks
+        )
+
+        # Threshold arrays aligned with self.stocks; disabled thresholds are NaN so they never match
+        self._symbols = [stock.get('symbol') for stock in self.stocks]
+        self._upper = np.array([self._active_threshold(stock.get('upper_threshold')) for stock in self.stocks], dtype=float)
+        self._lower = np.array([self._active_threshold(stock.get('lower_threshold')) for stock in self.stocks], dtype=float)
+
+    @staticmethod
+    def _active_threshold(threshold: Optional[float]) -> float:
+        """Return the threshold, or NaN if it is disabled (None, 0 or -1)"""
+        if threshold is not None and threshold > 0:
+            return threshold
+        return np.nan
+
+    def load_stocks(self) -> List[Dict]:
+        """Load stock threshold configuration from JSON file, reusing it if the file is unchanged"""
+        try:
+            return self._read_stocks()
         except Exception as e:
             logger.error(f"Error loading stock config: {str(e)}")
             return []
 
+    def _read_stocks(self) -> List[Dict]:
+        """Read and parse the config file, raising if it cannot be parsed"""
+        mtime = self._get_config_mtime()
+        if mtime is None:
+            logger.warning(f"Config file not found: {self.config_path}")
+            return []
+
+        cached = self._config_cache.get(self.config_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        with open(self.config_path, 'rb') as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson else json.loads(raw)
+        stocks = data.get('stocks', [])
+
+        # Display name used in logs and messages (name + symbol, or just symbol)
+        for stock in stocks:
+            symbol = stock.get('symbol')
+            name = stock.get('name', '')
+            stock['display_name'] = f"{name} ({symbol})" if name else symbol
+
+        self._config_cache[self.config_path] = (mtime, stocks)
+        return stocks
+
     def check_thresholds(self, prices: Dict[str, Optional[float]]) -> List[Dict]:
         """
         Check if any stock prices have crossed their thresholds
@@ -47,24 +162,29 @@ class ThresholdChecker:
         """
         violations = []
 
-        for stock_config in self.stocks:
+        # Compare all prices at once (missing prices become NaN), then only visit flagged stocks
+        prices_arr = np.array([prices.get(symbol) for symbol in self._symbols], dtype=float)
+        missing = np.isnan(prices_arr)
+        upper_hits = prices_arr >= self._upper
+        lower_hits = prices_arr <= self._lower
+
+        for i in np.flatnonzero(missing | upper_hits | lower_hits):
+            stock_config = self.stocks[i]
             symbol = stock_config.get('symbol')
             name = stock_config.get('name', '')
+            display_name = stock_config['display_name']
             upper_threshold = stock_config.get('upper_threshold')
             lower_threshold = stock_config.get('lower_threshold')
 
-            # Create display name (show name if available, otherwise just symbol)
-            display_name = f"{name} ({symbol})" if name else symbol
-
-            if symbol not in prices or prices[symbol] is None:
+            if missing[i]:
                 logger.warning(f"No price data for {display_name}")
                 continue
 
             current_price = prices[symbol]
 
             # Check upper threshold
-            # Skip if threshold is None, 0, or -1 (disabled)
-            if upper_threshold is not None and upper_threshold > 0 and current_price >= upper_threshold:
+            # Disabled thresholds (None, 0, or -1) are NaN and never hit
+            if upper_hits[i]:
                 violations.append({
                     'symbol': symbol,
                     'name': name,
@@ -72,13 +192,13 @@ class ThresholdChecker:
                     'current_price': current_price,
                     'threshold': upper_threshold,
                     'threshold_type': 'upper',
-                    'message': f"{display_name} reached ${current_price:.4f} (threshold: ${upper_threshold:.4f})"
+                    'message': _UPPER_MSG.format(display_name=display_name, price=current_price, threshold=upper_threshold)
                 })
                 logger.info(f"Upper threshold violation: {display_name} at ${current_price:.4f}")
 
             # Check lower threshold
-            # Skip if threshold is None, 0, or -1 (disabled)
-            if lower_threshold is not None and lower_threshold > 0 and current_price <= lower_threshold:
+            # Disabled thresholds (None, 0, or -1) are NaN and never hit
+            if lower_hits[i]:
                 violations.append({
                     'symbol': symbol,
                     'name': name,
@@ -86,26 +206,37 @@ class ThresholdChecker:
                     'current_price': current_price,
                     'threshold': lower_threshold,
                     'threshold_type': 'lower',
-                    'message': f"{display_name} dropped to ${current_price:.4f} (threshold: ${lower_threshold:.4f})"
+                    'message': _LOWER_MSG.format(display_name=display_name, price=current_price, threshold=lower_threshold)
                 })
                 logger.info(f"Lower threshold violation: {display_name} at ${current_price:.4f}")
 
         return violations
 
+    def get_display_rows(self) -> List[StockRow]:
+        """Get display rows for all configured stocks, built once per config load"""
+        if self._rows is None:
+            self._rows = [
+                StockRow(
+                    stock.get('symbol'),
+                    stock.get('name', ''),
+                    stock['display_name'],
+                    stock.get('upper_threshold'),
+                    stock.get('lower_threshold'),
+                    stock.get('initial_value'),
+                    stock.get('initial_date'),
+                )
+                for stock in self.stocks
+            ]
+        return self._rows
+
     def get_tracked_symbols(self) -> List[str]:
         """Get list of all tracked stock symbols"""
-        return [stock.get('symbol') for stock in self.stocks if stock.get('symbol')]
+        return self._tracked_symbols
 
     def get_stock_display_names(self) -> List[str]:
         """Get list of display names (name + symbol or just symbol)"""
-        display_names = []
-        for stock in self.stocks:
-            symbol = stock.get('symbol')
-            name = stock.get('name', '')
-            if symbol:
-                display_names.append(f"{name} ({symbol})" if name else symbol)
-        return display_names
+        return [stock['display_name'] for stock in self.stocks if stock.get('symbol')]
 
     def get_symbol_to_name_map(self) -> Dict[str, str]:
         """Get mapping of symbol to name for display purposes"""
-        return {stock.get('symbol'): stock.get('name', '') for stock in self.stocks if stock.get('symbol')}
+        return self._symbol_to_name
@@ -3,27 +3,360 @@ Web Scraper Module
 Fetches stock prices by scraping public financial websites
 Alternative to API-based fetching to avoid rate limits
 """
-import requests
-from bs4 import BeautifulSoup
-from typing import Optional
+import httpx
+from selectolax.parser import HTMLParser
+from concurrent.futures import ProcessPoolExecutor
+from contextvars import ContextVar
+from typing import Dict, Optional, Set, Tuple
+from urllib.parse import urlsplit
+import asyncio
 import logging
+import os
+import random
 import re
+import time
 
 logger = logging.getLogger(__name__)
 
+# Browser-like headers sent with every request
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9,fr;q=0.8',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+# Per-request timeout for scraped pages (time spent waiting for a host token is not counted)
+REQUEST_TIMEOUT = httpx.Timeout(10.0)
+
+# Requests a site may receive back to back before per-host pacing kicks in
+HOST_BURST = 5
+
+# Set inside a lower-priority source's task once every higher-priority source
+# has finished without a price; while a host is paced, the task waits for it
+# before taking a token, so tokens aren't spent on pages that get thrown away
+_source_needed: ContextVar[Optional[asyncio.Event]] = ContextVar('_source_needed', default=None)
+
+# Price parsing: numbers with decimals (both . and , as decimal separators)
+# Pattern matches: 123.45, 123,45, 1,234.56, 1.234,56
+_PRICE_RE = re.compile(r'[\d\s]+[.,]\d+|\d+')
+_STRIP_CURRENCY_CHARS = str.maketrans('', '', '$€')
+_CURRENCY_TOKENS = ('USD', 'EUR')
+
+# CSS selectors, built once at import. selectolax has no reusable compiled-selector
+# object, so each lookup still parses its selector string (a negligible cost).
+_BOURSORAMA_LINK_SELECTOR = 'a[href*="/cours/"]'
+
+# Boursorama typically has price in a span with specific classes
+_BOURSORAMA_PRICE_SELECTORS = (
+    'span.c-instrument--last',
+    'span.c-faceplate__price',
+    'div.c-faceplate__price span',
+    '[data-ist-last]',
+    'span[class*="c-instrument"]',
+    'div[class*="c-faceplate"]',
+    # New selectors for 2024+ Boursorama layout
+    'span.c-instrument__val',
+    'div.c-price',
+)
+
+_GOOGLE_PRICE_SELECTORS = (
+    'div.YMlKec.fxKbKc',  # Current price div
+    '[data-last-price]',
+    'div[jsname="ip75Cb"]',
+)
+
+_MARKETWATCH_PRICE_SELECTORS = (
+    'bg-quote.value',
+    'h3.intraday__price span.value',
+    '[class*="LastPrice"]',
+)
+
+
+def _fast_price(text: str) -> Optional[float]:
+    """
+    Convert a simple price such as "175.50", "$175.50" or "175,50" without the regex path
+
+    Returns:
+        The price, or None if the text needs the full parser
+    """
+    if text and text[0] in '$€':
+        text = text[1:]
+
+    # A lone comma is the decimal separator; any other mix of separators takes the slow path
+    if ',' in text:
+        if '.' in text:
+            return None
+        text = text.replace(',', '.', 1)
+
+    head, _, tail = text.partition('.')
+    if head.isascii() and head.isdigit() and tail.isascii() and (tail.isdigit() or not tail):
+        return float(text)
+    return None
+
+
+def _find_price(body: bytes, selectors: Tuple[str, ...]) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Parse a page and extract the price from the first matching selector
+
+    Module-level so it can run in a parse worker process.
+
+    Args:
+        body: Raw page body
+        selectors: CSS selectors to try in order
+
+    Returns:
+        Tuple of (price, selector that found it), or (None, None) if no selector yields a price
+    """
+    tree = HTMLParser(body)
+    for selector in selectors:
+        price_elem = tree.css_first(selector)
+        if price_elem:
+            # Extract number from text (handle formats like "175,50 EUR" or "175.50")
+            price = WebScraper._extract_price(price_elem.text(strip=True))
+            if price:
+                return price, selector
+    return None, None
+
+
+class TokenBucket:
+    """Paces requests to one host: bursts of up to `capacity`, then `rate` requests per second"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request may be sent; waiters are served in arrival order"""
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
 
 class WebScraper:
     """Scrapes stock prices from various financial websites"""
 
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9,fr;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-        })
+        """Initialize WebScraper"""
+        # HTTP/2 client used by the scrapers, created inside the running event loop
+        self._http = None
+        self._http_loop = None
+
+        # Conditional requests: URL -> (ETag, Last-Modified) of the last full page,
+        # and URL -> price parsed from it, reused when the site answers 304 Not Modified
+        self._validators: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        self._last_prices: Dict[str, float] = {}
+
+        # Optional worker processes for HTML parsing (0 = parse in the event loop thread)
+        self.parse_workers = int(os.getenv('SCRAPER_PARSE_WORKERS', '0'))
+        self._parse_pool = None
+
+        # (source, symbol) -> selectors reordered so the one that last found the price comes first
+        self._selector_hints: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+
+        # Only the start of each page is downloaded (0 = whole page); pages where the
+        # price was not found in that part are fetched again in full, and from then on
+        self.max_page_bytes = int(os.getenv('SCRAPER_MAX_PAGE_KB', '64')) * 1024
+        self._truncated_urls: Set[str] = set()
+        self._full_page_urls: Set[str] = set()
+
+        # Per-host request pacing, only applied to requests that actually hit the network
+        self.host_rate = int(os.getenv('SCRAPER_REQUESTS_PER_MINUTE', '20')) / 60
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    async def _get_http(self) -> httpx.AsyncClient:
+        """
+        Get the HTTP client for the running event loop
+
+        HTTP/2 multiplexes the concurrent requests to one site over a single TLS connection.
+        """
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http.is_closed or self._http_loop is not loop:
+            limits = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+            self._http = httpx.AsyncClient(http2=True, limits=limits, timeout=REQUEST_TIMEOUT,
+                                           headers=DEFAULT_HEADERS, follow_redirects=True)
+            self._http_loop = loop
+            self._buckets = {}  # Their locks belong to the previous event loop
+        return self._http
+
+    async def _wait_for_host(self, url: str):
+        """Respect the per-host request rate (SCRAPER_REQUESTS_PER_MINUTE)"""
+        if self.host_rate <= 0:
+            return
+
+        host = urlsplit(url).hostname or ''
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.host_rate, HOST_BURST)
+
+        needed = _source_needed.get()
+        if needed is not None:
+            # Cancelled meanwhile if a higher-priority source finds the price
+            await needed.wait()
+        await bucket.acquire()
+
+    async def aclose(self):
+        """Close the HTTP client and stop the parse workers"""
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+        self._http_loop = None
+
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=True)
+            self._parse_pool = None
+
+    async def _parse_price(self, url: str, body: bytes, source: str, symbol: str,
+                           selectors: Tuple[str, ...]) -> Optional[float]:
+        """
+        Find the price in a page, in a worker process if SCRAPER_PARSE_WORKERS is set
+
+        The selector that worked last time for this source and symbol is tried first.
+        """
+        key = (source, symbol)
+        selectors = self._selector_hints.get(key, selectors)
+
+        price, selector = await self._find_price(body, selectors)
+        if selector is None and self._use_full_page(url):
+            # The price may lie past the part downloaded: fetch the whole page right away
+            self._forget_price(url)
+            status, body = await self._fetch(url)
+            if status == 200:
+                price, selector = await self._find_price(body, selectors)
+
+        if selector is not None:
+            if selector != selectors[0]:
+                self._selector_hints[key] = (selector,) + tuple(s for s in selectors if s != selector)
+        else:
+            self._forget_price(url)
+        return price
+
+    async def _find_price(self, body: bytes, selectors: Tuple[str, ...]) -> Tuple[Optional[float], Optional[str]]:
+        """Run _find_price() inline or in the parse worker pool"""
+        if self.parse_workers <= 0:
+            return _find_price(body, selectors)
+
+        # Workers are started lazily, and again after aclose()
+        if self._parse_pool is None:
+            self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._parse_pool, _find_price, body, selectors)
+
+    def _forget_price(self, url: str):
+        """Drop the remembered price and validators of a page that no longer yields a price"""
+        self._last_prices.pop(url, None)
+        self._validators.pop(url, None)
+
+    def _use_full_page(self, url: str) -> bool:
+        """
+        Stop truncating a page if what we looked for was not in the part downloaded
+
+        Returns:
+            True if the last download of the page was cut off and should be fetched again in full
+        """
+        if url not in self._truncated_urls:
+            return False
+
+        self._truncated_urls.discard(url)
+        self._full_page_urls.add(url)
+        logger.info(f"Nothing found in the first {self.max_page_bytes // 1024} KB of {url}, reading the full page")
+        return True
+
+    def _conditional_headers(self, url: str) -> Optional[Dict[str, str]]:
+        """Get If-None-Match/If-Modified-Since headers for a page we already have a price from"""
+        if url not in self._last_prices or url not in self._validators:
+            return None
+
+        etag, last_modified = self._validators[url]
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    async def _fetch(self, url: str) -> Tuple[int, bytes]:
+        """
+        Fetch a page, backing off once with jitter if the site rate-limits us
+
+        Pages we already parsed a price from are requested conditionally, so an
+        unchanged page comes back as 304 with an empty body. The body is streamed
+        and cut off after max_page_bytes, since the price sits near the top.
+
+        Args:
+            url: Page URL
+
+        Returns:
+            Tuple of (HTTP status, raw page body), the body possibly cut off after max_page_bytes
+        """
+        http = await self._get_http()
+        headers = self._conditional_headers(url)
+        limit = 0 if url in self._full_page_urls else self.max_page_bytes
+        await self._wait_for_host(url)
+        status, body, validators, truncated = await self._stream(http, url, headers, limit)
+
+        if status == 429:
+            delay = random.uniform(1, 3)
+            logger.warning(f"Rate limited by {url}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            await self._wait_for_host(url)
+            status, body, validators, truncated = await self._stream(http, url, headers, limit)
+
+        if truncated:
+            self._truncated_urls.add(url)
+        else:
+            self._truncated_urls.discard(url)
+
+        if status == 200:
+            if any(validators):
+                self._validators[url] = validators
+            else:
+                self._validators.pop(url, None)
+
+        return status, body
+
+    @staticmethod
+    async def _stream(http: httpx.AsyncClient, url: str, headers: Optional[Dict[str, str]],
+                      limit: int) -> Tuple[int, bytes, Tuple[Optional[str], Optional[str]], bool]:
+        """
+        Download a page, stopping once limit bytes were read (0 = no limit)
+
+        Returns:
+            Tuple of (HTTP status, body, (ETag, Last-Modified), whether the body was cut off)
+        """
+        async with http.stream('GET', url, headers=headers) as response:
+            chunks = []
+            size = 0
+            truncated = False
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if limit and size >= limit:
+                    truncated = True
+                    break
+            validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            return response.status_code, b''.join(chunks), validators, truncated
+
+    def _unchanged_price(self, url: str, display_name: str, source: str) -> Optional[float]:
+        """Get the price parsed last time from a page the site reports as not modified"""
+        price = self._last_prices.get(url)
+        if price is None:
+            logger.warning(f"{source} returned 304 for {display_name} but no earlier price is known")
+            return None
+        logger.info(f"{source} page unchanged for {display_name}, reusing {price:.4f}")
+        return price
 
     def _convert_to_boursorama_symbol(self, symbol: str) -> str:
         """
@@ -46,7 +379,7 @@ class WebScraper:
         # US stocks: 1rP{SYMBOL} (e.g., 1rPAAPL for Apple)
         return f"1rP{symbol}"
 
-    def get_price_from_boursorama(self, symbol: str, name: str = '') -> Optional[float]:
+    async def get_price_from_boursorama(self, symbol: str, name: str = '') -> Optional[float]:
         """
         Fetch stock price from Boursorama (French financial site)
 
@@ -70,55 +403,54 @@ class WebScraper:
                 url = f"https://www.boursorama.com/recherche/?query={symbol}"
                 logger.info(f"Searching Boursorama for ISIN {display_name}: {url}")
 
-                response = self.session.get(url, timeout=10)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'lxml')
-                    # Find the first stock result link
-                    stock_link = soup.select_one('a[href*="/cours/"]')
-                    if stock_link:
-                        stock_url = stock_link.get('href')
-                        if stock_url.startswith('/'):
-                            stock_url = f"https://www.boursorama.com{stock_url}"
-                        logger.info(f"Found stock page: {stock_url}")
-                        response = self.session.get(stock_url, timeout=10)
-                        soup = BeautifulSoup(response.text, 'lxml')
+                status, body = await self._fetch(url)
+                if status == 304:
+                    return self._unchanged_price(url, display_name, 'Boursorama')
+                if status != 200:
+                    logger.warning(f"Boursorama returned status {status} for {display_name}")
+                    return None
+
+                tree = HTMLParser(body)
+                # Find the first stock result link
+                stock_link = tree.css_first(_BOURSORAMA_LINK_SELECTOR)
+                if stock_link is None and self._use_full_page(url):
+                    self._forget_price(url)
+                    status, body = await self._fetch(url)
+                    if status != 200:
+                        logger.warning(f"Boursorama returned status {status} for {display_name}")
+                        return None
+                    tree = HTMLParser(body)
+                    stock_link = tree.css_first(_BOURSORAMA_LINK_SELECTOR)
+
+                if stock_link:
+                    stock_url = stock_link.attributes.get('href') or ''
+                    if stock_url.startswith('/'):
+                        stock_url = f"https://www.boursorama.com{stock_url}"
+                    logger.info(f"Found stock page: {stock_url}")
+                    url = stock_url
+                    status, body = await self._fetch(url)
+                    if status == 304:
+                        return self._unchanged_price(url, display_name, 'Boursorama')
             else:
                 # Regular symbol
                 boursorama_symbol = self._convert_to_boursorama_symbol(symbol)
                 url = f"https://www.boursorama.com/cours/{boursorama_symbol}/"
 
                 logger.info(f"Fetching {display_name} from Boursorama: {url}")
-                response = self.session.get(url, timeout=10)
+                status, body = await self._fetch(url)
 
-                if response.status_code != 200:
-                    logger.warning(f"Boursorama returned status {response.status_code} for {display_name}")
+                if status == 304:
+                    return self._unchanged_price(url, display_name, 'Boursorama')
+                if status != 200:
+                    logger.warning(f"Boursorama returned status {status} for {display_name}")
                     return None
 
-                soup = BeautifulSoup(response.text, 'lxml')
-
             # Look for the price in common CSS selectors
-            # Boursorama typically has price in a span with specific classes
-            price_selectors = [
-                'span.c-instrument--last',
-                'span.c-faceplate__price',
-                'div.c-faceplate__price span',
-                '[data-ist-last]',
-                'span[class*="c-instrument"]',
-                'div[class*="c-faceplate"]',
-                # New selectors for 2024+ Boursorama layout
-                'span.c-instrument__val',
-                'div.c-price',
-            ]
-
-            for selector in price_selectors:
-                price_elem = soup.select_one(selector)
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
-                    # Extract number from text (handle formats like "175,50 EUR" or "175.50")
-                    price = self._extract_price(price_text)
-                    if price:
-                        logger.info(f"Fetched {display_name} from Boursorama: €{price:.4f}")
-                        return price
+            price = await self._parse_price(url, body, 'boursorama', symbol, _BOURSORAMA_PRICE_SELECTORS)
+            if price:
+                self._last_prices[url] = price
+                logger.info(f"Fetched {display_name} from Boursorama: €{price:.4f}")
+                return price
 
             logger.warning(f"Could not find price element for {display_name} on Boursorama")
             return None
@@ -127,7 +459,7 @@ class WebScraper:
             logger.error(f"Error fetching {display_name} from Boursorama: {str(e)}")
             return None
 
-    def get_price_from_google_finance(self, symbol: str, name: str = '') -> Optional[float]:
+    async def get_price_from_google_finance(self, symbol: str, name: str = '') -> Optional[float]:
         """
         Fetch stock price from Google Finance
 
@@ -152,29 +484,20 @@ class WebScraper:
             url = f"https://www.google.com/finance/quote/{exchange_symbol.replace(':', ':')}"
 
             logger.info(f"Fetching {display_name} from Google Finance: {url}")
-            response = self.session.get(url, timeout=10)
+            status, body = await self._fetch(url)
 
-            if response.status_code != 200:
-                logger.warning(f"Google Finance returned status {response.status_code} for {display_name}")
+            if status == 304:
+                return self._unchanged_price(url, display_name, 'Google Finance')
+            if status != 200:
+                logger.warning(f"Google Finance returned status {status} for {display_name}")
                 return None
 
-            soup = BeautifulSoup(response.text, 'lxml')
-
             # Google Finance price selectors
-            price_selectors = [
-                'div.YMlKec.fxKbKc',  # Current price div
-                '[data-last-price]',
-                'div[jsname="ip75Cb"]',
-            ]
-
-            for selector in price_selectors:
-                price_elem = soup.select_one(selector)
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
-                    price = self._extract_price(price_text)
-                    if price:
-                        logger.info(f"Fetched {display_name} from Google Finance: ${price:.4f}")
-                        return price
+            price = await self._parse_price(url, body, 'google', symbol, _GOOGLE_PRICE_SELECTORS)
+            if price:
+                self._last_prices[url] = price
+                logger.info(f"Fetched {display_name} from Google Finance: ${price:.4f}")
+                return price
 
             logger.warning(f"Could not find price element for {display_name} on Google Finance")
             return None
@@ -183,7 +506,7 @@ class WebScraper:
             logger.error(f"Error fetching {display_name} from Google Finance: {str(e)}")
             return None
 
-    def get_price_from_marketwatch(self, symbol: str, name: str = '') -> Optional[float]:
+    async def get_price_from_marketwatch(self, symbol: str, name: str = '') -> Optional[float]:
         """
         Fetch stock price from MarketWatch
 
@@ -201,29 +524,20 @@ class WebScraper:
             url = f"https://www.marketwatch.com/investing/stock/{symbol.lower()}"
 
             logger.info(f"Fetching {display_name} from MarketWatch: {url}")
-            response = self.session.get(url, timeout=10)
+            status, body = await self._fetch(url)
 
-            if response.status_code != 200:
-                logger.warning(f"MarketWatch returned status {response.status_code} for {display_name}")
+            if status == 304:
+                return self._unchanged_price(url, display_name, 'MarketWatch')
+            if status != 200:
+                logger.warning(f"MarketWatch returned status {status} for {display_name}")
                 return None
 
-            soup = BeautifulSoup(response.text, 'lxml')
-
             # MarketWatch price selectors
-            price_selectors = [
-                'bg-quote.value',
-                'h3.intraday__price span.value',
-                '[class*="LastPrice"]',
-            ]
-
-            for selector in price_selectors:
-                price_elem = soup.select_one(selector)
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
-                    price = self._extract_price(price_text)
-                    if price:
-                        logger.info(f"Fetched {display_name} from MarketWatch: ${price:.4f}")
-                        return price
+            price = await self._parse_price(url, body, 'marketwatch', symbol, _MARKETWATCH_PRICE_SELECTORS)
+            if price:
+                self._last_prices[url] = price
+                logger.info(f"Fetched {display_name} from MarketWatch: ${price:.4f}")
+                return price
 
             logger.warning(f"Could not find price element for {display_name} on MarketWatch")
             return None
@@ -232,7 +546,8 @@ class WebScraper:
             logger.error(f"Error fetching {display_name} from MarketWatch: {str(e)}")
             return None
 
-    def _extract_price(self, text: str) -> Optional[float]:
+    @staticmethod
+    def _extract_price(text: str) -> Optional[float]:
         """
         Extract price from text string
         Handles various formats: "175.50", "$175.50", "175,50 EUR", etc.
@@ -244,35 +559,36 @@ class WebScraper:
             Extracted price as float or None
         """
         try:
-            # Remove currency symbols and extra whitespace
-            text = text.strip().replace('$', '').replace('€', '').replace('USD', '').replace('EUR', '')
+            text = text.strip()
 
-            # Find numbers with decimals (both . and , as decimal separators)
-            # Pattern matches: 123.45, 123,45, 1,234.56, 1.234,56
-            matches = re.findall(r'[\d\s]+[.,]\d+|[\d]+', text)
+            # Fast path: plain "175.50" needs no cleanup
+            price = _fast_price(text)
+            if price is not None:
+                return price
 
-            if not matches:
-                return None
+            # Remove currency symbols
+            text = text.translate(_STRIP_CURRENCY_CHARS)
+            for token in _CURRENCY_TOKENS:
+                if token in text:
+                    text = text.replace(token, '')
 
-            # Take the first match and clean it
-            price_str = matches[0].strip()
+            match = _PRICE_RE.search(text)
+            if not match:
+                return None
 
-            # Remove spaces (for numbers like "1 234.56")
-            price_str = price_str.replace(' ', '')
+            # Take the first match and remove spaces (for numbers like "1 234.56")
+            price_str = match.group().strip().replace(' ', '')
 
             # Handle European format (comma as decimal separator)
-            # If there's a comma after the last dot, or only comma, use comma as decimal
-            if ',' in price_str and '.' in price_str:
-                # Determine which is decimal separator (the last one)
-                if price_str.rindex(',') > price_str.rindex('.'):
+            # The last separator is the decimal one; with only a comma, use comma as decimal
+            last_comma = price_str.rfind(',')
+            if last_comma >= 0:
+                if last_comma > price_str.rfind('.'):
                     # Comma is decimal separator: "1.234,56" -> "1234.56"
                     price_str = price_str.replace('.', '').replace(',', '.')
                 else:
                     # Dot is decimal separator: "1,234.56" -> "1234.56"
                     price_str = price_str.replace(',', '')
-            elif ',' in price_str:
-                # Only comma: assume it's decimal separator
-                price_str = price_str.replace(',', '.')
 
             return float(price_str)
 
@@ -280,9 +596,14 @@ class WebScraper:
             logger.debug(f"Could not extract price from '{text}': {str(e)}")
             return None
 
-    def get_stock_price(self, symbol: str, sources: list = None, name: str = '') -> Optional[float]:
+    async def get_stock_price_async(self, symbol: str, sources: list = None, name: str = '') -> Optional[float]:
         """
-        Fetch stock price trying multiple sources in order
+        Fetch stock price from multiple sources concurrently
+
+        All sources are queried at once, but the price of the highest-priority
+        source that has one is used; lower-priority requests are then cancelled.
+        While hosts are paced, lower-priority sources only send requests once
+        they are needed.
 
         Args:
             symbol: Stock ticker symbol or ISIN code
@@ -307,24 +628,71 @@ class WebScraper:
             else:
                 sources = ['marketwatch', 'google', 'boursorama']
 
+        scrapers = {
+            'google': self.get_price_from_google_finance,
+            'marketwatch': self.get_price_from_marketwatch,
+            'boursorama': self.get_price_from_boursorama,
+        }
+
+        # Tasks in priority order: a source's price is only used once every
+        # higher-priority source has finished without one (the same ticker can
+        # be a different instrument on another site)
+        tasks = {}
         for source in sources:
+            scraper = scrapers.get(source)
+            if scraper is None:
+                logger.warning(f"Unknown source: {source}")
+                continue
+            # The task copies the current context, including its _source_needed event
+            needed = asyncio.Event() if tasks else None
+            token = _source_needed.set(needed)
             try:
-                if source == 'google':
-                    price = self.get_price_from_google_finance(symbol, name=name)
-                elif source == 'marketwatch':
-                    price = self.get_price_from_marketwatch(symbol, name=name)
-                elif source == 'boursorama':
-                    price = self.get_price_from_boursorama(symbol, name=name)
-                else:
-                    logger.warning(f"Unknown source: {source}")
+                task = asyncio.create_task(scraper(symbol, name=name))
+            finally:
+                _source_needed.reset(token)
+            tasks[task] = (source, needed)
+
+        try:
+            for task, (source, needed) in tasks.items():
+                if needed is not None:
+                    needed.set()
+                try:
+                    price = await task
+                except Exception as e:
+                    logger.error(f"Error with source {source} for {display_name}: {str(e)}")
                     continue
 
                 if price is not None:
                     return price
-
-            except Exception as e:
-                logger.error(f"Error with source {source} for {display_name}: {str(e)}")
-                continue
+        finally:
+            # Lower-priority sources still running are no longer needed
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
         logger.error(f"All sources failed for {display_name}")
         return None
+
+    def get_stock_price(self, symbol: str, sources: list = None, name: str = '') -> Optional[float]:
+        """
+        Fetch stock price from multiple sources concurrently (blocking)
+
+        Synchronous wrapper around get_stock_price_async() for callers without
+        an event loop; uses a short-lived HTTP session.
+
+        Args:
+            symbol: Stock ticker symbol or ISIN code
+            sources: List of sources to try (default: auto-detect based on symbol)
+            name: Optional stock name for better logging
+
+        Returns:
+            Current stock price or None if all sources fail
+        """
+        async def fetch() -> Optional[float]:
+            try:
+                return await self.get_stock_price_async(symbol, sources, name)
+            finally:
+                await self.aclose()
+
+        return asyncio.run(fetch())